@@ -5,14 +5,47 @@ arquivos e patches de pull requests.
 """
 
 import os
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+import aiohttp
 import requests
-from github import Github
+from github import Github, GithubException
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# HTTP statuses worth retrying: rate limits and server-side errors.
+TRANSIENT_HTTP_STATUSES = (403, 429)
+
+def is_transient_error(exception):
+    """
+    Decide whether a failed GitHub call is worth retrying.
+
+    Deterministic failures such as a 404 for a file that does not exist at
+    the commit are not retried; only rate limits (403/429), 5xx responses
+    and network-level errors are.
+
+    Args:
+        exception (BaseException): The exception raised by the call.
+
+    Returns:
+        bool: True if the call should be retried.
+    """
+    if isinstance(exception, GithubException):
+        return exception.status in TRANSIENT_HTTP_STATUSES or exception.status >= 500
+    if isinstance(exception, aiohttp.ClientResponseError):
+        return exception.status in TRANSIENT_HTTP_STATUSES or exception.status >= 500
+    if isinstance(exception, requests.HTTPError):
+        response = exception.response
+        if response is None:
+            return True
+        return response.status_code in TRANSIENT_HTTP_STATUSES or response.status_code >= 500
+    return isinstance(exception, (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError))
+
 class GithubClient:
     """
     A client for interacting with the GitHub API to manage pull requests and repository content.
@@ -31,6 +64,11 @@ class GithubClient:
             self.client = Github(login_or_token=token, base_url=self.base_url)
             self.repo_name = os.getenv('GITHUB_REPOSITORY')
             self.repo = self.client.get_repo(self.repo_name)
+            # A (commit_sha, filename) pair maps to immutable content, so
+            # results can be cached for the lifetime of the process.
+            self._file_content_cache = {}
+            self._pr_cache = {}
+            self._session = None
             logging.info("Initialized GitHub client for repository: %s", self.repo_name)
         except Exception as e:
             logging.error("Error initializing GitHub client: %s", e)
@@ -46,8 +84,11 @@ class GithubClient:
         Returns:
             PullRequest: The pull request object.
         """
+        if pr_id in self._pr_cache:
+            return self._pr_cache[pr_id]
         try:
             pr = self.repo.get_pull(pr_id)
+            self._pr_cache[pr_id] = pr
             logging.info("Retrieved PR ID: %s", pr_id)
             return pr
         except Exception as e:
@@ -111,10 +152,18 @@ class GithubClient:
             logging.error("Error retrieving files for commit %s: %s", commit.sha, e)
             raise
 
+    @retry(wait=wait_random_exponential(min=1, max=30),
+           stop=stop_after_attempt(5),
+           retry=retry_if_exception(is_transient_error),
+           reraise=True)
     def get_file_content(self, commit_sha, filename):
         """
         Retrieve the content of a file at a specific commit.
 
+        Transient GitHub errors (5xx, rate limits, network failures) are
+        retried with exponential backoff; deterministic errors such as a
+        404 fail immediately.
+
         Args:
             commit_sha (str): The commit SHA.
             filename (str): The name of the file.
@@ -122,8 +171,11 @@ class GithubClient:
         Returns:
             str: The content of the file.
         """
+        if (commit_sha, filename) in self._file_content_cache:
+            return self._file_content_cache[(commit_sha, filename)]
         try:
             content = self.repo.get_contents(filename, ref=commit_sha).decoded_content.decode()
+            self._file_content_cache[(commit_sha, filename)] = content
             logging.info("Retrieved content for file: %s at commit: %s", filename, commit_sha)
             return content
         except Exception as e:
@@ -135,6 +187,105 @@ class GithubClient:
             )
             raise
 
+    def get_file_contents(self, commit_sha, filenames, max_workers=16):
+        """
+        Retrieve the content of several files at a specific commit in parallel.
+
+        Synchronous counterpart to aget_file_content for callers without an
+        event loop: the fetches are pure I/O, so a thread pool cuts the wall
+        time from the sum of the round trips to roughly the slowest one.
+
+        Args:
+            commit_sha (str): The commit SHA.
+            filenames (list): The names of the files.
+            max_workers (int): The maximum number of concurrent fetches.
+
+        Returns:
+            list: (filename, content) pairs in input order; content is None
+                for files that could not be retrieved.
+        """
+        def fetch(filename):
+            try:
+                return filename, self.get_file_content(commit_sha, filename)
+            except Exception as e:
+                logging.warning("Failed to get file %s at commit %s: %s", filename, commit_sha, e)
+                return filename, None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(fetch, filenames))
+
+    @retry(wait=wait_random_exponential(min=1, max=30),
+           stop=stop_after_attempt(5),
+           retry=retry_if_exception(is_transient_error),
+           reraise=True)
+    async def aget_file_content(self, commit_sha, filename):
+        """
+        Asynchronously retrieve the content of a file at a specific commit.
+
+        Uses the raw contents endpoint directly so that many files can be
+        fetched concurrently without blocking the event loop. Transient
+        errors are retried with exponential backoff; deterministic errors
+        such as a 404 fail immediately.
+
+        Args:
+            commit_sha (str): The commit SHA.
+            filename (str): The name of the file.
+
+        Returns:
+            str: The content of the file.
+        """
+        if (commit_sha, filename) in self._file_content_cache:
+            return self._file_content_cache[(commit_sha, filename)]
+        try:
+            # Percent-encode the path: characters like '#' or '?' in a
+            # filename would otherwise be parsed as fragment/query markers.
+            url = f"{self.base_url}/repos/{self.repo_name}/contents/{quote(filename)}"
+            session = self.get_session()
+            async with session.get(url, params={'ref': commit_sha}) as response:
+                response.raise_for_status()
+                content = await response.text()
+            self._file_content_cache[(commit_sha, filename)] = content
+            logging.info("Retrieved content for file: %s at commit: %s", filename, commit_sha)
+            return content
+        except aiohttp.ClientError as e:
+            logging.error(
+                "Error retrieving content for file %s at commit %s: %s",
+                filename,
+                commit_sha,
+                e
+            )
+            raise
+
+    def get_session(self):
+        """
+        Return the shared aiohttp session, creating it on first use.
+
+        One keep-alive connection pool serves all asynchronous fetches, so
+        the TLS handshake is paid once per run instead of once per file.
+        Must be called from within a running event loop.
+
+        Returns:
+            aiohttp.ClientSession: The shared session.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=60),
+                headers={
+                    'Authorization': f"token {os.getenv('GITHUB_TOKEN')}",
+                    'Accept': 'application/vnd.github.raw'
+                }
+            )
+        return self._session
+
+    async def aclose(self):
+        """
+        Close the shared aiohttp session if it was opened.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
     def get_pr_patch(self, pr_id):
         """
         Retrieve the patch content of a pull request.
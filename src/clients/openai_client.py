@@ -4,7 +4,7 @@ A classe OpenAIClient pode ser usada para gerar respostas de um modelo especific
 """
 
 import logging
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,6 +26,7 @@ class OpenAIClient:
         """
         try:
             self.client = OpenAI()
+            self.async_client = None
             self.model = model
             self.temperature = temperature
             self.max_tokens = max_tokens
@@ -69,3 +70,38 @@ class OpenAIClient:
         except Exception as e:
             logging.error("Error generating response from OpenAI model: %s", e)
             raise
+
+    async def agenerate_response(self, prompt):
+        """
+        Asynchronously generate a response from the OpenAI model based on the given prompt.
+
+        The async client is created lazily so that synchronous callers never
+        pay for it.
+
+        Args:
+            prompt (str): The prompt to send to the OpenAI API.
+
+        Returns:
+            str: The generated response from the OpenAI model.
+
+        Raises:
+            Exception: If there is an error generating the response.
+        """
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI()
+        try:
+            logging.info("Generating response from OpenAI model.")
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are an expert Developer."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens
+            )
+            logging.info("Response generated successfully.")
+            return response.choices[0].message.content
+        except Exception as e:
+            logging.error("Error generating response from OpenAI model: %s", e)
+            raise
@@ -2,15 +2,107 @@
 Main module for handling the code review process using ChatGPT and GitHub API.
 """
 
+import asyncio
+import hashlib
+import importlib
 import logging
+import os
 import re
-from clients.github_client import GithubClient
-from clients.openai_client import OpenAIClient
+import tiktoken
 from utils.helpers import get_env_variable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Token budget per review request, leaving headroom for the completion.
+REVIEW_TOKEN_BUDGET = 12000
+
+# Number of concurrent per-file review workers in files mode.
+MAX_CONCURRENT_REVIEWS = 10
+
+# Content larger than this is generated or vendored, not hand-written code.
+MAX_FILE_CONTENT_BYTES = 200_000
+
+# GitHub rejects issue comments over 65536 characters; leave headroom for
+# the comment header that is prepended to each chunk.
+MAX_COMMENT_CHARS = 65000
+
+# File types that never benefit from review and only inflate the prompt.
+SKIP_FILE_SUFFIXES = ('.lock', '.min.js', '.min.css', '.png', '.jpg', '.jpeg', '.gif', '.ico', '.pdf')
+
+# Directory holding cached reviews keyed by the SHA-256 of their prompt.
+REVIEW_CACHE_DIR = "/tmp/genai-code-review-cache"
+
+# Client classes are imported lazily: openai alone pulls in pydantic and
+# httpx, which dominates process startup for small PRs.
+CLIENT_MODULES = {
+    'GithubClient': 'clients.github_client',
+    'OpenAIClient': 'clients.openai_client',
+}
+
+def load_client_class(name):
+    """
+    Resolve a client class by name, importing its module on first use.
+
+    Args:
+        name (str): The client class name, e.g. 'GithubClient'.
+
+    Returns:
+        type: The client class.
+    """
+    if name in globals():
+        return globals()[name]
+    module = importlib.import_module(CLIENT_MODULES[name])
+    return getattr(module, name)
+
+def __getattr__(name):
+    # Keep main.GithubClient / main.OpenAIClient resolvable (and patchable)
+    # even though the imports are deferred into main().
+    if name in CLIENT_MODULES:
+        return load_client_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Static review prompt templates; only content and language vary per call.
+CUSTOM_PROMPT_TEMPLATE = (
+    "{custom_prompt}\n"
+    "### Code\n"
+    "```{content}```\n\n"
+    "Write this code review in the following {language}:\n\n"
+)
+
+DEFAULT_PROMPT_TEMPLATE = (
+    "Please review the following code for clarity, efficiency, and adherence to best practices."
+    "Identify any areas for improvement, suggest specific optimizations, and note potential bugs or security vulnerabilities. "
+    "Additionally, provide suggestions for how to address the identified issues, with a focus on maintainability and scalability. "
+    "Include examples of code where relevant. Use markdown formatting for your response:\n\n"
+    "Write this code review in the following {language}:\n\n"
+    "Do not write the code or guidelines in the review. Only write the review itself.\n\n"
+    "### Code\n```{content}```\n\n"
+    "### Review Guidelines\n"
+    "1. **Clarity**: Is the code easy to understand?\n"
+    "2. **Efficiency**: Are there any performance improvements?\n"
+    "3. **Best Practices**: Does the code follow standard coding conventions?\n"
+    "4. **Bugs/Security**: Are there any potential bugs or security vulnerabilities?\n"
+    "5. **Maintainability**: Is the code easy to maintain and scale?\n\n"
+    "### Review Example\n"
+    "1. **Issue**: The variable names are not descriptive.\n"
+    "   **Suggestion**: Use more descriptive variable names that reflect their purpose. For example:\n"
+    "   ```python\n"
+    "   # Instead of this:\n"
+    "   x = 5\n"
+    "   # Use this:\n"
+    "   item_count = 5\n"
+    "   ```\n"
+    "2. **Issue**: There is a potential SQL injection vulnerability.\n"
+    "   **Suggestion**: Use parameterized queries to prevent SQL injection. For example:\n"
+    "   ```python\n"
+    "   # Instead of this:\n"
+    "   cursor.execute(f'SELECT * FROM users WHERE username = (username)')\n"
+    "   # Use this:\n"
+    "   cursor.execute('SELECT * FROM users WHERE username = %s', (username,))\n"
+    "   ```"
+)
+
 def main():
     """
     Main function to handle the code review process based on the mode specified.
@@ -21,10 +113,15 @@ def main():
         logging.error("Environment variable error: %s", e)
         return
 
-    github_client = GithubClient(env_vars['GITHUB_TOKEN'], env_vars['GITHUB_BASE_URL'])
-    openai_client = OpenAIClient(env_vars['OPENAI_MODEL'],
-                                 env_vars['OPENAI_TEMPERATURE'],
-                                 env_vars['OPENAI_MAX_TOKENS'])
+    if env_vars['MODE'] not in ("files", "patch"):
+        logging.error("Invalid mode. Choose either 'files' or 'patch'.")
+        raise ValueError("Invalid mode. Choose either 'files' or 'patch'.")
+
+    github_client = load_client_class('GithubClient')(env_vars['GITHUB_TOKEN'],
+                                                      env_vars['GITHUB_BASE_URL'])
+    openai_client = load_client_class('OpenAIClient')(env_vars['OPENAI_MODEL'],
+                                                      env_vars['OPENAI_TEMPERATURE'],
+                                                      env_vars['OPENAI_MAX_TOKENS'])
 
     language = env_vars.get('LANGUAGE', 'en')
     custom_prompt = env_vars.get('CUSTOM_PROMPT')
@@ -32,24 +129,21 @@ def main():
     exclude_regex = env_vars.get('EXCLUDE_REGEX')
 
     if env_vars['MODE'] == "files":
-        process_files(
+        asyncio.run(process_files(
           github_client,
           openai_client,
           env_vars['GITHUB_PR_ID'],
           language,
           custom_prompt,
           include_regex,
-          exclude_regex)
-    elif env_vars['MODE'] == "patch":
+          exclude_regex))
+    else:
         process_patch(
           github_client,
           openai_client,
           env_vars['GITHUB_PR_ID'],
           language,
           custom_prompt)
-    else:
-        logging.error("Invalid mode. Choose either 'files' or 'patch'.")
-        raise ValueError("Invalid mode. Choose either 'files' or 'patch'.")
 
 def get_env_vars():
     """
@@ -78,25 +172,28 @@ def get_env_vars():
     }
 
     env_vars = {}
+    loaded = []
     for var, (var_type, required) in variables.items():
         value = get_env_variable(var, required)
-        if value:
-            try:
-                env_vars[var] = var_type(value)
-                logging.info(
-                    "%s (%s) retrieved and converted successfully.",
-                    var,
-                    var_type.__name__
-                )
-            except ValueError as e:
-                logging.error("%s must be of type %s. Error: %s", var, var_type.__name__, e)
-                raise ValueError(f"{var} must be of type {var_type.__name__}.") from e
-        else:
+        if not value:
             env_vars[var] = None
+            continue
+        if var_type is str:
+            # str(value) would be a no-op; store the value directly.
+            env_vars[var] = value
+            loaded.append(var)
+            continue
+        try:
+            env_vars[var] = var_type(value)
+            loaded.append(var)
+        except ValueError as e:
+            logging.error("%s must be of type %s. Error: %s", var, var_type.__name__, e)
+            raise ValueError(f"{var} must be of type {var_type.__name__}.") from e
 
+    logging.info("Loaded environment variables: %s", ", ".join(loaded))
     return env_vars
 
-def process_files(github_client, openai_client, pr_id, language, custom_prompt, include_regex, exclude_regex):
+async def process_files(github_client, openai_client, pr_id, language, custom_prompt, include_regex, exclude_regex):
     """
     Process the files changed in the last commit of the pull request.
 
@@ -111,22 +208,26 @@ def process_files(github_client, openai_client, pr_id, language, custom_prompt,
     """
     logging.info("Processing files for PR ID: %s", pr_id)
     pull_request = github_client.get_pr(pr_id)
-    commits = list(pull_request.get_commits())
 
-    if not commits:
+    if pull_request.commits == 0:
         logging.info("No commits found.")
         return
 
-    last_commit = commits[-1]
-    analyze_commit_files(
-      github_client,
-      openai_client,
-      pr_id,
-      last_commit,
-      language,
-      custom_prompt,
-      include_regex,
-      exclude_regex)
+    # Fetch only the newest commit; listing the whole paginated commit set
+    # costs one round trip per page just to take the last element.
+    last_commit = pull_request.get_commits().reversed[0]
+    try:
+        await analyze_commit_files(
+          github_client,
+          openai_client,
+          pr_id,
+          last_commit,
+          language,
+          custom_prompt,
+          include_regex,
+          exclude_regex)
+    finally:
+        await github_client.aclose()
 
 def process_patch(github_client, openai_client, pr_id, language, custom_prompt):
     """
@@ -147,9 +248,106 @@ def process_patch(github_client, openai_client, pr_id, language, custom_prompt):
         return
     analyze_patch(github_client, openai_client, pr_id, patch_content, language, custom_prompt)
 
-def analyze_commit_files(github_client, openai_client, pr_id, commit, language, custom_prompt, include_regex, exclude_regex):
+def get_cached_review(prompt):
+    """
+    Look up a previously generated review for an identical prompt.
+
+    Args:
+        prompt (str): The review prompt.
+
+    Returns:
+        str: The cached review, or None on a cache miss.
+    """
+    key = hashlib.sha256(prompt.encode()).hexdigest()
+    try:
+        with open(os.path.join(REVIEW_CACHE_DIR, key), encoding='utf-8') as cache_file:
+            return cache_file.read()
+    except OSError:
+        return None
+
+def cache_review(prompt, review):
+    """
+    Store a generated review keyed by the hash of its prompt.
+
+    Args:
+        prompt (str): The review prompt.
+        review (str): The generated review.
+    """
+    key = hashlib.sha256(prompt.encode()).hexdigest()
+    try:
+        os.makedirs(REVIEW_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(REVIEW_CACHE_DIR, key), 'w', encoding='utf-8') as cache_file:
+            cache_file.write(review)
+    except OSError as e:
+        logging.warning("Could not cache review: %s", e)
+
+def generate_review(openai_client, prompt):
     """
-    Analyze all files in a given commit together and post a single comment.
+    Generate a review for a prompt, reusing a cached one when available.
+
+    Args:
+        openai_client (OpenAIClient): The OpenAI client instance.
+        prompt (str): The review prompt.
+
+    Returns:
+        str: The generated or cached review.
+    """
+    cached = get_cached_review(prompt)
+    if cached is not None:
+        logging.info("Reusing cached review for identical prompt.")
+        return cached
+    # Guard the dump so the multi-KB prompt is only formatted when needed.
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Review prompt:\n%s", prompt)
+    review = openai_client.generate_response(prompt)
+    cache_review(prompt, review)
+    return review
+
+async def agenerate_review(openai_client, prompt):
+    """
+    Asynchronously generate a review for a prompt, reusing a cached one when available.
+
+    Args:
+        openai_client (OpenAIClient): The OpenAI client instance.
+        prompt (str): The review prompt.
+
+    Returns:
+        str: The generated or cached review.
+    """
+    cached = get_cached_review(prompt)
+    if cached is not None:
+        logging.info("Reusing cached review for identical prompt.")
+        return cached
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Review prompt:\n%s", prompt)
+    review = await openai_client.agenerate_response(prompt)
+    cache_review(prompt, review)
+    return review
+
+def count_tokens(text, model):
+    """
+    Count the number of tokens in a text for a given model.
+
+    Args:
+        text (str): The text to count tokens for.
+        model (str): The OpenAI model name.
+
+    Returns:
+        int: The number of tokens.
+    """
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return len(encoding.encode(text))
+
+async def analyze_commit_files(github_client, openai_client, pr_id, commit, language, custom_prompt, include_regex, exclude_regex):
+    """
+    Analyze all files in a given commit and post a single comment.
+
+    Each file is fetched and reviewed by a pool of worker coroutines fed
+    from a queue, so no combined prompt is ever materialized and memory
+    stays bounded regardless of how large the pull request is.
 
     Args:
         github_client (GithubClient): The GitHub client instance.
@@ -164,27 +362,81 @@ def analyze_commit_files(github_client, openai_client, pr_id, commit, language,
     logging.info("Analyzing files in commit: %s", commit.sha)
     files = github_client.get_commit_files(commit)
 
-    if include_regex:
-        logging.info("Including only files matching regex: %s", include_regex)
-        files = [file for file in files if re.search(include_regex, file.filename)]
+    # Compile the patterns once and filter in a single pass over the files.
+    include_pattern = re.compile(include_regex) if include_regex else None
+    exclude_pattern = re.compile(exclude_regex) if exclude_regex else None
 
-    if exclude_regex:
+    if include_pattern:
+        logging.info("Including only files matching regex: %s", include_regex)
+    if exclude_pattern:
         logging.info("Excluding files matching regex: %s", exclude_regex)
-        files = [file for file in files if not re.search(exclude_regex, file.filename)]
 
-    combined_content = ""
+    files = [
+        file for file in files
+        if (include_pattern is None or include_pattern.search(file.filename))
+        and (exclude_pattern is None or not exclude_pattern.search(file.filename))
+    ]
+
+    # Deleted files have no content at the reviewed commit; fetching them
+    # can only 404, so drop them before they reach the queue.
+    files = [file for file in files if file.status != "removed"]
+
+    # Producer/consumer: a bounded pool of workers drains the queue, each
+    # fetching one file and reviewing it, so concurrency stays clear of
+    # GitHub secondary rate limits and OpenAI request limits alike.
+    queue = asyncio.Queue()
     for file in files:
-        logging.info("Processing file: %s", file.filename)
-        try:
-          content = github_client.get_file_content(commit.sha, file.filename)
-          combined_content += f"\n### File: {file.filename}\n```{content}```\n"
-        except:
-          logging.warning("Failed to get file: %s", file.filename)
+        queue.put_nowait(file)
+
+    file_reviews = {}
+    skipped = []
 
-    review = openai_client.generate_response(create_review_prompt(combined_content,
-                                                                  language,
-                                                                  custom_prompt))
-    github_client.post_comment(pr_id, f"ChatGPT's code review:\n {review}")
+    async def worker():
+        while True:
+            try:
+                file = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            logging.info("Processing file: %s", file.filename)
+            if file.filename.endswith(SKIP_FILE_SUFFIXES):
+                logging.info("Skipping generated or binary file type: %s", file.filename)
+                skipped.append(file.filename)
+                continue
+            try:
+                content = await github_client.aget_file_content(commit.sha, file.filename)
+            except Exception:
+                logging.warning("Failed to get file: %s", file.filename)
+                continue
+            if len(content) > MAX_FILE_CONTENT_BYTES or "\0" in content[:512]:
+                logging.info("Skipping oversized or binary file content: %s", file.filename)
+                skipped.append(file.filename)
+                continue
+            section = "".join(("\n### File: ", file.filename, "\n```", content, "```\n"))
+            if count_tokens(section, openai_client.model) > REVIEW_TOKEN_BUDGET:
+                logging.warning("Skipping file exceeding token budget: %s", file.filename)
+                skipped.append(file.filename)
+                continue
+            prompt = create_review_prompt(section, language, custom_prompt)
+            file_reviews[file.filename] = await agenerate_review(openai_client, prompt)
+
+    await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENT_REVIEWS)))
+
+    sections = [
+        f"## {file.filename}\n{file_reviews[file.filename]}"
+        for file in files if file.filename in file_reviews
+    ]
+    if skipped:
+        sections.append("".join(("_Skipped files: ", ", ".join(sorted(skipped)), "_")))
+
+    # One review per file can add up well past GitHub's comment size limit,
+    # so the aggregate is posted as as many comments as it needs.
+    bodies = chunk_comment_sections(sections) or [""]
+    for index, body in enumerate(bodies):
+        if len(bodies) == 1:
+            header = "ChatGPT's code review:"
+        else:
+            header = f"ChatGPT's code review ({index + 1}/{len(bodies)}):"
+        github_client.post_comment(pr_id, "\n ".join((header, body)))
 
 def analyze_patch(github_client, openai_client, pr_id, patch_content, language, custom_prompt):
     """
@@ -200,27 +452,68 @@ def analyze_patch(github_client, openai_client, pr_id, patch_content, language,
     """
     logging.info("Analyzing patch content for PR ID: %s", pr_id)
 
-    # Use regex to split on actual file diffs
-    file_diffs = re.split(r'(?=^diff --git )', patch_content, flags=re.MULTILINE)
+    # Scan the patch line by line; a plain prefix check on each line is
+    # cheaper than the multiline-regex machinery for locating file headers.
+    diff_parts = []
+    current_lines = []
+    file_name = None
+    for line in patch_content.splitlines(keepends=True):
+        if line.startswith("diff --git "):
+            if current_lines:
+                diff_parts.append(format_diff_section(file_name, "".join(current_lines)))
+                current_lines = []
+            file_name = line.split(" b/", 1)[1].rstrip() if " b/" in line else "Unknown file"
+            logging.info("Processing diff for file: %s", file_name)
+        if file_name is not None:
+            current_lines.append(line)
+    if current_lines:
+        diff_parts.append(format_diff_section(file_name, "".join(current_lines)))
+
+    combined_diff = "".join(diff_parts)
+    review_prompt = create_review_prompt(combined_diff, language, custom_prompt)
+    summary = generate_review(openai_client, review_prompt)
+    github_client.post_comment(pr_id, "\n ".join(("ChatGPT's code review:", summary)))
 
-    combined_diff = ""
-    for diff_text in file_diffs:
-        if diff_text.strip():
-            try:
-                match = re.search(r'^diff --git a\/.+ b\/(.+)', diff_text, re.MULTILINE)
-                file_name = match.group(1) if match else "Unknown file"
-                logging.info("Processing diff for file: %s", file_name)
-                combined_diff += f"\n### File: {file_name}\n```diff\n{diff_text.strip()}```\n"
-            except Exception as e:
-                logging.error("Error processing diff: %s", str(e))
-                github_client.post_comment(
-                    pr_id,
-                    f"ChatGPT was unable to process the diff for a file: {str(e)}"
-                )
+def chunk_comment_sections(sections, limit=MAX_COMMENT_CHARS):
+    """
+    Greedily pack comment sections into bodies that fit GitHub's size limit.
 
-    review_prompt = create_review_prompt(combined_diff, language, custom_prompt)
-    summary = openai_client.generate_response(review_prompt)
-    github_client.post_comment(pr_id, f"ChatGPT's code review:\n {summary}")
+    Args:
+        sections (list): The text sections to pack, in order.
+        limit (int): The maximum number of characters per comment body.
+
+    Returns:
+        list: The list of comment bodies.
+    """
+    truncation_notice = "\n\n_[truncated to fit GitHub's comment size limit]_"
+    bodies = []
+    current_parts = []
+    current_len = 0
+    for section in sections:
+        if len(section) > limit:
+            section = section[:limit - len(truncation_notice)] + truncation_notice
+        if current_parts and current_len + len(section) + 2 > limit:
+            bodies.append("\n\n".join(current_parts))
+            current_parts = []
+            current_len = 0
+        current_parts.append(section)
+        current_len += len(section) + 2
+    if current_parts:
+        bodies.append("\n\n".join(current_parts))
+    return bodies
+
+def format_diff_section(file_name, diff_text):
+    """
+    Format a single file's diff as a section of the review prompt.
+
+    Args:
+        file_name (str): The name of the file the diff belongs to.
+        diff_text (str): The raw diff text.
+
+    Returns:
+        str: The formatted section.
+    """
+    return f"\n### File: {file_name}\n```diff\n{diff_text.strip()}```\n"
 
 def create_review_prompt(content, language, custom_prompt=None):
     """
@@ -236,44 +529,12 @@ def create_review_prompt(content, language, custom_prompt=None):
     """
     if custom_prompt:
         logging.info("Using custom prompt: %s", custom_prompt)
-        return (
-            f"{custom_prompt}\n"
-            "### Code\n"
-            f"```{content}```\n\n"
-            f"Write this code review in the following {language}:\n\n"
+        return CUSTOM_PROMPT_TEMPLATE.format(
+            custom_prompt=custom_prompt,
+            content=content,
+            language=language
         )
-    return (
-        f"Please review the following code for clarity, efficiency, and adherence to best practices."
-        f"Identify any areas for improvement, suggest specific optimizations, and note potential bugs or security vulnerabilities. "
-        f"Additionally, provide suggestions for how to address the identified issues, with a focus on maintainability and scalability. "
-        f"Include examples of code where relevant. Use markdown formatting for your response:\n\n"
-        f"Write this code review in the following {language}:\n\n"
-        f"Do not write the code or guidelines in the review. Only write the review itself.\n\n"
-        f"### Code\n```{content}```\n\n"
-        f"### Review Guidelines\n"
-        f"1. **Clarity**: Is the code easy to understand?\n"
-        f"2. **Efficiency**: Are there any performance improvements?\n"
-        f"3. **Best Practices**: Does the code follow standard coding conventions?\n"
-        f"4. **Bugs/Security**: Are there any potential bugs or security vulnerabilities?\n"
-        f"5. **Maintainability**: Is the code easy to maintain and scale?\n\n"
-        f"### Review Example\n"
-        f"1. **Issue**: The variable names are not descriptive.\n"
-        f"   **Suggestion**: Use more descriptive variable names that reflect their purpose. For example:\n"
-        f"   ```python\n"
-        f"   # Instead of this:\n"
-        f"   x = 5\n"
-        f"   # Use this:\n"
-        f"   item_count = 5\n"
-        f"   ```\n"
-        f"2. **Issue**: There is a potential SQL injection vulnerability.\n"
-        f"   **Suggestion**: Use parameterized queries to prevent SQL injection. For example:\n"
-        f"   ```python\n"
-        f"   # Instead of this:\n"
-        f"   cursor.execute(f'SELECT * FROM users WHERE username = (username)')\n"
-        f"   # Use this:\n"
-        f"   cursor.execute('SELECT * FROM users WHERE username = %s', (username,))\n"
-        f"   ```"
-    )
+    return DEFAULT_PROMPT_TEMPLATE.format(content=content, language=language)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+from github import GithubException
 from clients.github_client import GithubClient
 import os
 
@@ -75,6 +76,59 @@ class TestGithubClient(unittest.TestCase):
         self.mock_repo.get_contents.assert_called_with(self.filename, ref=self.commit_sha)
         self.assertEqual(content, "file content")
 
+    def test_get_file_content_cached(self):
+        mock_content = MagicMock()
+        mock_content.decoded_content.decode.return_value = "file content"
+        self.mock_repo.get_contents.return_value = mock_content
+
+        self.github_client.get_file_content(self.commit_sha, self.filename)
+        content = self.github_client.get_file_content(self.commit_sha, self.filename)
+        self.mock_repo.get_contents.assert_called_once_with(self.filename, ref=self.commit_sha)
+        self.assertEqual(content, "file content")
+
+    def test_get_file_contents_parallel(self):
+        mock_content = MagicMock()
+        mock_content.decoded_content.decode.return_value = "file content"
+        self.mock_repo.get_contents.return_value = mock_content
+
+        results = self.github_client.get_file_contents(self.commit_sha, ["a.py", "b.py"])
+        self.assertEqual(results, [("a.py", "file content"), ("b.py", "file content")])
+
+    @patch('tenacity.nap.time.sleep')
+    def test_get_file_contents_returns_none_on_failure(self, mock_sleep):
+        self.mock_repo.get_contents.side_effect = GithubException(404, "Not found", None)
+
+        results = self.github_client.get_file_contents(self.commit_sha, ["missing.py"])
+        self.assertEqual(results, [("missing.py", None)])
+
+    def test_get_file_content_does_not_retry_not_found(self):
+        self.mock_repo.get_contents.side_effect = GithubException(404, "Not found", None)
+
+        with self.assertRaises(GithubException):
+            self.github_client.get_file_content(self.commit_sha, self.filename)
+        self.assertEqual(self.mock_repo.get_contents.call_count, 1)
+
+    @patch('tenacity.nap.time.sleep')
+    def test_get_file_content_retries_transient_error(self, mock_sleep):
+        mock_content = MagicMock()
+        mock_content.decoded_content.decode.return_value = "file content"
+        self.mock_repo.get_contents.side_effect = [
+            GithubException(502, "Bad gateway", None),
+            mock_content
+        ]
+
+        content = self.github_client.get_file_content(self.commit_sha, self.filename)
+        self.assertEqual(content, "file content")
+        self.assertEqual(self.mock_repo.get_contents.call_count, 2)
+
+    def test_get_pr_cached(self):
+        mock_pr = MagicMock()
+        self.mock_repo.get_pull.return_value = mock_pr
+        self.github_client.get_pr(self.pr_id)
+        pr = self.github_client.get_pr(self.pr_id)
+        self.mock_repo.get_pull.assert_called_once_with(self.pr_id)
+        self.assertEqual(pr, mock_pr)
+
     @patch('clients.github_client.requests.get')
     def test_get_pr_patch(self, mock_get):
         mock_response = MagicMock()
@@ -90,5 +144,41 @@ class TestGithubClient(unittest.TestCase):
         }, timeout=60)
         self.assertEqual(patch_content, "patch content")
 
+class TestGithubClientAsync(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        os.environ['GITHUB_REPOSITORY'] = "fake_repo"
+        os.environ['GITHUB_TOKEN'] = "fake_github_token"
+        with patch('clients.github_client.Github'):
+            self.github_client = GithubClient("fake_github_token", "fake_repo_url")
+
+    def tearDown(self):
+        del os.environ['GITHUB_REPOSITORY']
+        del os.environ['GITHUB_TOKEN']
+
+    async def test_get_session_is_shared(self):
+        session = self.github_client.get_session()
+        self.assertIs(self.github_client.get_session(), session)
+        await self.github_client.aclose()
+        self.assertTrue(session.closed)
+
+    async def test_aclose_without_session(self):
+        await self.github_client.aclose()
+
+    async def test_aget_file_content_quotes_filename(self):
+        response = MagicMock()
+        response.text = AsyncMock(return_value="file content")
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=False)
+        session = MagicMock()
+        session.get.return_value = context
+
+        with patch.object(self.github_client, 'get_session', return_value=session):
+            content = await self.github_client.aget_file_content("fake_sha", "docs/a#b.md")
+        self.assertEqual(content, "file content")
+        url = session.get.call_args[0][0]
+        self.assertIn("docs/a%23b.md", url)
+
 if __name__ == '__main__':
     unittest.main()
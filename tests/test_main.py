@@ -1,7 +1,8 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import logging
-from main import main, get_env_vars, process_files, process_patch, analyze_commit_files, analyze_patch, create_review_prompt
+import tempfile
+from main import main, get_env_vars, process_files, process_patch, analyze_commit_files, analyze_patch, create_review_prompt, chunk_comment_sections
 
 class TestMainModule(unittest.TestCase):
 
@@ -90,10 +91,143 @@ class TestMainModule(unittest.TestCase):
         github_client = MockGithubClient()
         openai_client = MockOpenAIClient()
         github_client.get_pr_patch.return_value = 'diff --git a/file b/file'
+        openai_client.generate_response.return_value = 'review text'
 
-        process_patch(github_client, openai_client, 1, 'en', None)
+        with patch('main.REVIEW_CACHE_DIR', tempfile.mkdtemp()):
+            process_patch(github_client, openai_client, 1, 'en', None)
         github_client.get_pr_patch.assert_called_with(1)
         openai_client.generate_response.assert_called()
 
+    @patch('main.GithubClient')
+    @patch('main.OpenAIClient')
+    def test_analyze_patch_splits_files(self, MockGithubClient, MockOpenAIClient):
+        github_client = MockGithubClient()
+        openai_client = MockOpenAIClient()
+        openai_client.generate_response.return_value = 'review text'
+        patch_content = (
+            'diff --git a/foo.py b/foo.py\n'
+            '--- a/foo.py\n'
+            '+++ b/foo.py\n'
+            '@@ -1 +1 @@\n'
+            '-old\n'
+            '+new\n'
+            'diff --git a/bar.py b/bar.py\n'
+            '+++ b/bar.py\n'
+            '@@ -0,0 +1 @@\n'
+            '+hello\n'
+        )
+
+        with patch('main.REVIEW_CACHE_DIR', tempfile.mkdtemp()):
+            analyze_patch(github_client, openai_client, 1, patch_content, 'en', None)
+        prompt = openai_client.generate_response.call_args[0][0]
+        self.assertIn('### File: foo.py', prompt)
+        self.assertIn('### File: bar.py', prompt)
+        self.assertIn('+hello', prompt)
+
+    def test_chunk_comment_sections_packs_within_limit(self):
+        bodies = chunk_comment_sections(['aaaa', 'bbbb', 'cccc'], limit=12)
+        self.assertEqual(bodies, ['aaaa\n\nbbbb', 'cccc'])
+
+    def test_chunk_comment_sections_truncates_oversized_section(self):
+        bodies = chunk_comment_sections(['x' * 200], limit=100)
+        self.assertEqual(len(bodies), 1)
+        self.assertLessEqual(len(bodies[0]), 100)
+        self.assertIn('truncated', bodies[0])
+
+    def test_review_cache_roundtrip(self):
+        from main import cache_review, get_cached_review
+        with patch('main.REVIEW_CACHE_DIR', tempfile.mkdtemp()):
+            self.assertIsNone(get_cached_review('some prompt'))
+            cache_review('some prompt', 'some review')
+            self.assertEqual(get_cached_review('some prompt'), 'some review')
+            self.assertIsNone(get_cached_review('another prompt'))
+
+    @patch('main.OpenAIClient')
+    def test_generate_review_uses_cache(self, MockOpenAIClient):
+        from main import generate_review
+        openai_client = MockOpenAIClient()
+        openai_client.generate_response.return_value = 'fresh review'
+
+        with patch('main.REVIEW_CACHE_DIR', tempfile.mkdtemp()):
+            first = generate_review(openai_client, 'prompt')
+            second = generate_review(openai_client, 'prompt')
+        self.assertEqual(first, 'fresh review')
+        self.assertEqual(second, 'fresh review')
+        openai_client.generate_response.assert_called_once()
+
+class TestAnalyzeCommitFiles(unittest.IsolatedAsyncioTestCase):
+
+    @patch('main.count_tokens')
+    async def test_analyze_commit_files_reviews_each_file(self, mock_count_tokens):
+        mock_count_tokens.return_value = 1
+        github_client = MagicMock()
+        file1 = MagicMock(filename='foo.py', status='modified')
+        file2 = MagicMock(filename='bar.py', status='added')
+        deleted = MagicMock(filename='gone.py', status='removed')
+        github_client.get_commit_files.return_value = [file1, file2, deleted]
+        github_client.aget_file_content = AsyncMock(return_value='print(1)')
+        openai_client = MagicMock()
+        openai_client.model = 'gpt-3.5-turbo'
+        openai_client.agenerate_response = AsyncMock(return_value='file review')
+        commit = MagicMock(sha='abc123')
+
+        with patch('main.REVIEW_CACHE_DIR', tempfile.mkdtemp()):
+            await analyze_commit_files(github_client, openai_client, 1, commit, 'en', None, None, None)
+
+        self.assertEqual(openai_client.agenerate_response.await_count, 2)
+        self.assertEqual(github_client.aget_file_content.await_count, 2)
+        body = github_client.post_comment.call_args[0][1]
+        self.assertIn('## foo.py', body)
+        self.assertIn('## bar.py', body)
+        self.assertNotIn('gone.py', body)
+
+    @patch('main.count_tokens')
+    async def test_analyze_commit_files_splits_long_comment(self, mock_count_tokens):
+        mock_count_tokens.return_value = 1
+        github_client = MagicMock()
+        file1 = MagicMock(filename='foo.py', status='modified')
+        file2 = MagicMock(filename='bar.py', status='modified')
+        github_client.get_commit_files.return_value = [file1, file2]
+        github_client.aget_file_content = AsyncMock(return_value='print(1)')
+        openai_client = MagicMock()
+        openai_client.model = 'gpt-3.5-turbo'
+        openai_client.agenerate_response = AsyncMock(return_value='x' * 40000)
+        commit = MagicMock(sha='abc123')
+
+        with patch('main.REVIEW_CACHE_DIR', tempfile.mkdtemp()):
+            await analyze_commit_files(github_client, openai_client, 1, commit, 'en', None, None, None)
+
+        self.assertEqual(github_client.post_comment.call_count, 2)
+        first_body = github_client.post_comment.call_args_list[0][0][1]
+        second_body = github_client.post_comment.call_args_list[1][0][1]
+        self.assertIn("ChatGPT's code review (1/2):", first_body)
+        self.assertIn("ChatGPT's code review (2/2):", second_body)
+
+    @patch('main.count_tokens')
+    async def test_analyze_commit_files_skips_binary_and_oversized(self, mock_count_tokens):
+        mock_count_tokens.return_value = 1
+        github_client = MagicMock()
+        source = MagicMock(filename='app.py')
+        lockfile = MagicMock(filename='poetry.lock')
+        binary = MagicMock(filename='data.bin')
+        github_client.get_commit_files.return_value = [source, lockfile, binary]
+
+        async def fake_content(sha, filename):
+            return '\0binary' if filename == 'data.bin' else 'print(1)'
+
+        github_client.aget_file_content = AsyncMock(side_effect=fake_content)
+        openai_client = MagicMock()
+        openai_client.model = 'gpt-3.5-turbo'
+        openai_client.agenerate_response = AsyncMock(return_value='file review')
+        commit = MagicMock(sha='abc123')
+
+        with patch('main.REVIEW_CACHE_DIR', tempfile.mkdtemp()):
+            await analyze_commit_files(github_client, openai_client, 1, commit, 'en', None, None, None)
+
+        self.assertEqual(openai_client.agenerate_response.await_count, 1)
+        body = github_client.post_comment.call_args[0][1]
+        self.assertIn('## app.py', body)
+        self.assertIn('_Skipped files: data.bin, poetry.lock_', body)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
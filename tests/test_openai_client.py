@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from clients.openai_client import OpenAIClient  # Substitua 'your_module' pelo nome do seu módulo.
 
 class TestOpenAIClient(unittest.TestCase):
@@ -35,6 +35,23 @@ class TestOpenAIClient(unittest.TestCase):
         with self.assertRaises(Exception) as context:
             self.client.generate_response("This will fail.")
         self.assertTrue("API error" in str(context.exception))
-        
+
+class TestOpenAIClientAsync(unittest.IsolatedAsyncioTestCase):
+
+    @patch('clients.openai_client.OpenAI')
+    def setUp(self, MockOpenAI):
+        self.client = OpenAIClient(model="gpt-3.5-turbo", temperature=0.7, max_tokens=150)
+
+    async def test_agenerate_response_success(self):
+        with patch('clients.openai_client.AsyncOpenAI') as MockAsyncOpenAI:
+            mock_async = MockAsyncOpenAI.return_value
+            mock_async.chat.completions.create = AsyncMock(
+                return_value=MagicMock(choices=[MagicMock(message=MagicMock(content="Async response"))])
+            )
+            response = await self.client.agenerate_response("Hello, how are you?")
+            self.assertEqual(response, "Async response")
+            mock_async.chat.completions.create.assert_awaited_once()
+
+
 if __name__ == '__main__':
     unittest.main()